@@ -1,7 +1,12 @@
-import json
 import os
 import sys
-import time # <-- New: Import the time module
+
+from msgspec.structs import replace
+
+from kanji_common import (
+    JLPT_OUTPUT_FILES, KanjiDocument, make_jlpt_grouper, read_json, read_kanji_file,
+    write_json, write_json_files
+)
 
 # --- Configuration ---
 KANJI_INPUT_FILE = "kanji-org.json"
@@ -15,38 +20,28 @@ def load_dictionary():
     print(f"Loading dictionary from: {YOMICHAN_DICTIONARY_FILE}")
     dictionary = {}
     try:
-        with open(YOMICHAN_DICTIONARY_FILE, 'r', encoding='utf-8') as f:
-            # Yomichan files contain a single list of entries, where each entry is a list of data points.
-            yomichan_data = json.load(f)
+        # Yomichan files contain a single list of entries, where each entry is a list of data points.
+        yomichan_data = read_json(YOMICHAN_DICTIONARY_FILE)
         
-        # Preprocess the data into a simpler {character: [readings]} mapping
+        # Preprocess the data into a simpler {character: "READING, READING"} mapping
         for entry in yomichan_data:
             if len(entry) < 2:
                 continue # Skip malformed entries
             
-            # The character is always the first item in the list
-            character = entry[0] 
-            
-            # The dictionary definition (meaning) is the second item.
-            # This is a list of definition objects.
-            definitions = entry[1]
+            # entry[0] is the character; entry[1] is its list of definition objects.
+            # The Hán-Việt reading is usually the first text of each definition, so
+            # collect the unique, cleaned-up readings in a single set comprehension.
+            unique_readings = {
+                definition[0].strip()
+                for definition in entry[1]
+                if isinstance(definition, list) and definition and definition[0]
+            }
 
-            readings = []
-            
-            # Look for the Hán-Việt reading inside the definition structure
-            for definition in definitions:
-                if isinstance(definition, list) and len(definition) > 0:
-                    # The Hán-Việt reading is usually the first definition text
-                    raw_reading = definition[0]
-                    
-                    # Clean up the reading string
-                    if raw_reading:
-                        readings.append(raw_reading.strip())
-            
-            # Use a set to store unique readings for the character
-            unique_readings = set(readings)
+            # Store the final display string (CAPITALIZED, comma-separated) so lookups
+            # are a single hash probe. Many characters share a reading, so intern the
+            # string to keep one copy of each.
             if unique_readings:
-                dictionary[character] = list(unique_readings)
+                dictionary[entry[0]] = sys.intern(", ".join(r.upper() for r in sorted(unique_readings)))
 
         print(f"Dictionary loaded and mapped successfully with {len(dictionary):,} kanji entries.")
         return dictionary
@@ -59,93 +54,152 @@ def load_dictionary():
         print(f"\n❌ FATAL ERROR: An error occurred while reading the dictionary file: {e}")
         sys.exit(1)
 
-def get_han_viet_reading(character, dictionary):
-    """Retrieves the Hán-Việt reading for a character from the loaded dictionary."""
-    # The dictionary value is a list of readings, e.g., ["PHÂN"]
-    readings = dictionary.get(character)
-    
-    if readings:
-        # Format as CAPITALIZED, comma-separated string
-        return ", ".join(r.upper() for r in sorted(readings))
-    
-    return None
+def add_han_viet_readings(kanji_list, hvd_dictionary, copy=False, group=None):
+    """
+    Prepends the Hán-Việt reading to each entry's meaning ("READINGS, meaning").
+    Returns (entries, modified_count, skipped_count).
+
+    Entries are updated in place, unless copy=True: then the returned list holds
+    copies of the updated entries and kanji_list is left untouched. If group is
+    given, it is called with every original entry in the same pass.
+    """
+    entries = [] if copy else kanji_list
+    keep = entries.append if copy else None
+    modified_count = 0
+    skipped_count = 0
+
+    # The dictionary values are already formatted, so this is a single hash lookup
+    # per kanji. No per-entry printing: on a terminal, writing and flushing stdout
+    # costs more than the lookup itself. Entries are structs, so fields are plain
+    # attribute reads rather than dict lookups.
+    lookup = hvd_dictionary.get
+
+    for kanji_entry in kanji_list:
+        if group is not None:
+            group(kanji_entry)
+
+        character = kanji_entry.character
+        current_meaning = kanji_entry.meaning
+
+        # A missing (UNSET) or null character or meaning leaves the entry untouched
+        sv_meaning = None
+        if character and isinstance(current_meaning, str):
+            sv_meaning = lookup(character)
+            if sv_meaning is None:
+                skipped_count += 1
+
+        if sv_meaning is None:
+            # Leave the entry untouched; no string is built for it
+            if copy:
+                keep(kanji_entry)
+            continue
+
+        # Requested format: "HÁN VIỆT READINGS, existing meaning"
+        new_meaning = f"{sv_meaning}, {current_meaning}" if current_meaning.strip() else sv_meaning
+        if copy:
+            keep(replace(kanji_entry, meaning=new_meaning))
+        else:
+            kanji_entry.meaning = new_meaning
+        modified_count += 1
+
+    return entries, modified_count, skipped_count
+
+def _read_kanji_input():
+    """Reads KANJI_INPUT_FILE, or prints an error and returns None."""
+    print(f"Reading input file: {KANJI_INPUT_FILE}", flush=True)
+    try:
+        return read_kanji_file(KANJI_INPUT_FILE)
+    except Exception as e:
+        print(f"❌ FATAL ERROR: Could not read or decode JSON from '{KANJI_INPUT_FILE}': {e}")
+        return None
+
+def _print_summary(title, modified_count, skipped_count):
+    """Prints the closing summary with the updated/skipped counts."""
+    print(f"\n" + "="*50)
+    print(title)
+    print(f"   {modified_count} kanji entries were updated with Hán-Việt readings.")
+    print(f"   {skipped_count} kanji entries were skipped (Hán-Việt reading not found in dictionary).")
+    print("="*50)
 
 def process_kanji_file():
     """Reads the kanji data, looks up Hán-Việt offline, and writes the output."""
     
     hvd_dictionary = load_dictionary()
     
-    print(f"Reading input file: {KANJI_INPUT_FILE}")
-    sys.stdout.flush()
-    
     # 1. Read the input file
-    try:
-        with open(KANJI_INPUT_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except Exception:
-        print(f"❌ FATAL ERROR: Could not read or decode JSON from '{KANJI_INPUT_FILE}'.")
+    data = _read_kanji_input()
+    if data is None:
         return
 
-    kanji_list = data.get('kanji', [])
-    total_kanji = len(kanji_list)
-    modified_count = 0
-    skipped_count = 0
+    # Entries are updated in place, so the list stays attached to `data` for writing
+    kanji_list = data.kanji
     
     # ⚠️ IMPORTANT: Since the dictionary is loaded into memory (offline), 
     # the lookups below are instantaneous and do not trigger rate limits.
-    # The pause is added purely to meet your request, but it is not necessary 
-    # to prevent rate limiting.
-    print(f"Found {total_kanji} kanji entries. Starting lookup with 5-second delay per entry...")
-    sys.stdout.flush()
+    # (An earlier version paused 5 seconds per entry; that pause was never
+    # necessary to prevent rate limiting and has been removed.)
+    print(f"Found {len(kanji_list)} kanji entries. Starting lookup...", flush=True)
     
-    # 2. Iterate and modify the 'meaning' field
-    for i, kanji_entry in enumerate(kanji_list):
-        character = kanji_entry.get('character')
-        current_meaning = kanji_entry.get('meaning')
-        
-        if character and current_meaning is not None:
-            
-            # Print status update
-            print(f"Processing {i+1}/{total_kanji}: '{character}'...", end='\r')
-            sys.stdout.flush()
-
-            sv_meaning = get_han_viet_reading(character, hvd_dictionary)
-            
-            # Clear the current line after processing
-            print(" ".ljust(80), end='\r') 
-
-            if sv_meaning:
-                # Update status with successful reading
-                print(f"✅ Processed {i+1}/{total_kanji}: '{character}' -> {sv_meaning.ljust(30)}")
-                
-                # Requested format: "HÁN VIỆT READINGS, existing meaning"
-                if current_meaning.strip():
-                     new_meaning = f"{sv_meaning}, {current_meaning}"
-                else:
-                    new_meaning = sv_meaning
-                
-                kanji_entry['meaning'] = new_meaning
-                modified_count += 1
-            else:
-                skipped_count += 1
-        
-        # ADD THE PAUSE HERE (5 seconds per kanji)
-        time.sleep(5) 
+    # 2. Modify the 'meaning' field
+    _, modified_count, skipped_count = add_han_viet_readings(kanji_list, hvd_dictionary)
 
     # 3. Write the output file
     try:
-        data['kanji'] = kanji_list 
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-            
-        print(f"\n" + "="*50)
-        print(f"✅ Processing Complete and File Saved!")
-        print(f"   Output saved to: {OUTPUT_FILE}")
-        print(f"   {modified_count} kanji entries were updated with Hán-Việt readings.")
-        print(f"   {skipped_count} kanji entries were skipped (Hán-Việt reading not found in dictionary).")
-        print("="*50)
+        write_json(OUTPUT_FILE, data)
     except Exception as e:
         print(f"❌ FATAL ERROR: Could not write output file {OUTPUT_FILE}: {e}")
-        
+        return
+
+    _print_summary(
+        f"✅ Processing Complete and File Saved!\n   Output saved to: {OUTPUT_FILE}",
+        modified_count, skipped_count
+    )
+
+def build_all():
+    """
+    Does the work of this script and split-kanji.py in one pass: reads the
+    input file once, looks up Hán-Việt and groups by JLPT level in the same
+    loop, then writes the merged file plus the five JLPT level files.
+
+    The JLPT files keep the original meanings, exactly as split-kanji.py
+    writes them; only the merged file gets the Hán-Việt readings.
+    """
+    
+    hvd_dictionary = load_dictionary()
+    
+    # 1. Read the input file (once, for both outputs)
+    data = _read_kanji_input()
+    if data is None:
+        return
+
+    kanji_list = data.kanji
+    print(f"Found {len(kanji_list)} kanji entries. Starting lookup and split...", flush=True)
+
+    # 2. Single pass: bucket each entry by category and build its merged entry.
+    # Matched entries are copied rather than updated in place, so the JLPT
+    # groups still hold the untouched originals.
+    jlpt_groups, group = make_jlpt_grouper()
+    merged_list, modified_count, skipped_count = add_han_viet_readings(
+        kanji_list, hvd_dictionary, copy=True, group=group
+    )
+
+    # 3. Write all six files
+    outputs = [(OUTPUT_FILE, KanjiDocument(kanji=merged_list))]
+    outputs += [
+        (output_filename, KanjiDocument(kanji=jlpt_groups[category]))
+        for category, output_filename in JLPT_OUTPUT_FILES.items()
+    ]
+
+    print("\nStarting file creation...")
+    if not write_json_files(outputs):
+        print("\n❌ FATAL ERROR: Some output files could not be written (see above).")
+        return
+
+    _print_summary("✅ Processing Complete!", modified_count, skipped_count)
+
 if __name__ == "__main__":
-    process_kanji_file()
\ No newline at end of file
+    # `python auto-sv-lookup.py --all` also writes the JLPT split files (see README)
+    if "--all" in sys.argv[1:]:
+        build_all()
+    else:
+        process_kanji_file()
@@ -0,0 +1,113 @@
+"""Shared helpers for the data scripts (split-kanji.py and auto-sv-lookup.py)."""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+
+import msgspec
+from msgspec import UNSET, UnsetType
+
+JLPT_OUTPUT_FILES = {
+    'jlptn5': "kanji-jlpt-n5.json",
+    'jlptn4': "kanji-jlpt-n4.json",
+    'jlptn3': "kanji-jlpt-n3.json",
+    'jlptn2': "kanji-jlpt-n2.json",
+    'jlptn1': "kanji-jlpt-n1.json"
+}
+
+# A field of a kanji entry: a string, null, or UNSET when the key is missing.
+# UNSET fields are left out on encode, so missing keys stay missing and nulls stay null.
+OptionalStr = Union[str, None, UnsetType]
+
+class KanjiEntry(msgspec.Struct, forbid_unknown_fields=True):
+    """
+    One kanji from kanji-org.json. To add a key to the data, declare it here
+    first: unknown keys are rejected rather than silently dropped.
+    """
+    # Declared in the same order as kanji-org.json, so the output keeps its key order
+    category: OptionalStr = UNSET
+    character: OptionalStr = UNSET
+    onyomi: OptionalStr = UNSET
+    kunyomi: OptionalStr = UNSET
+    meaning: OptionalStr = UNSET
+
+class KanjiDocument(msgspec.Struct, forbid_unknown_fields=True):
+    """A whole kanji file: {"kanji": [...]}."""
+    kanji: list[KanjiEntry] = []
+
+# Kanji files decode straight into the structs above (no intermediate dict per
+# entry); other files, like the Yomichan bank, are decoded without a schema.
+KANJI_DECODER = msgspec.json.Decoder(KanjiDocument)
+JSON_DECODER = msgspec.json.Decoder()
+JSON_ENCODER = msgspec.json.Encoder()
+
+def read_json(filename, decoder=JSON_DECODER):
+    """
+    Reads and decodes a whole JSON file. Raises OSError or msgspec.DecodeError
+    (msgspec.ValidationError when the data doesn't match the decoder's type).
+    """
+    # Read the whole file with one read() call; msgspec parses the UTF-8 bytes directly
+    with open(filename, 'rb') as f:
+        return decoder.decode(f.read())
+
+def read_kanji_file(filename):
+    """Reads a kanji file such as kanji-org.json into a KanjiDocument."""
+    return read_json(filename, KANJI_DECODER)
+
+def write_json(filename, data):
+    """Encodes data as UTF-8 JSON indented by 2 spaces and writes it to filename."""
+    # Encode the whole document first (msgspec writes UTF-8 and indents in C),
+    # then write it in one call
+    buf = msgspec.json.format(JSON_ENCODER.encode(data), indent=2)
+    with open(filename, 'wb') as f:
+        f.write(buf)
+
+def make_jlpt_grouper():
+    """
+    Returns (jlpt_groups, group): jlpt_groups has one list per key of
+    JLPT_OUTPUT_FILES, and group(kanji) appends an entry to the list for its
+    'category' (case-insensitive). Entries with a missing, null or non-JLPT
+    category are skipped.
+    """
+    jlpt_groups = {category: [] for category in JLPT_OUTPUT_FILES}
+
+    # Map each category straight to its list's bound append, so each entry costs
+    # a single dict lookup. Nearly every entry is a JLPT kanji, so index directly
+    # and treat a miss as the exceptional case.
+    # A missing (UNSET) or null category maps to '', so it is skipped the same way.
+    appenders = {category: group.append for category, group in jlpt_groups.items()}
+
+    def group(kanji):
+        try:
+            appenders[(kanji.category or '').lower()](kanji)
+        except KeyError:
+            pass
+
+    return jlpt_groups, group
+
+def group_by_jlpt(kanji_list):
+    """Groups kanji entries by JLPT level; see make_jlpt_grouper()."""
+    jlpt_groups, group = make_jlpt_grouper()
+    for kanji in kanji_list:
+        group(kanji)
+    return jlpt_groups
+
+def _write_one(output_filename, data):
+    """Writes one output file and returns (succeeded, status line to print)."""
+    try:
+        write_json(output_filename, data)
+        return True, f"✅ Created {output_filename} with {len(data.kanji)} entries."
+    except Exception as e:
+        return False, f"❌ Error writing file {output_filename}: {e}"
+
+def write_json_files(outputs):
+    """
+    Writes each (filename, data) pair in outputs. The files are independent, so
+    they are encoded and written concurrently; status lines are printed in order.
+    Returns True if every file was written.
+    """
+    all_written = True
+    # max_workers must be at least 1, even when there is nothing to write
+    with ThreadPoolExecutor(max_workers=max(1, len(outputs))) as executor:
+        for succeeded, status in executor.map(lambda item: _write_one(*item), outputs):
+            print(status)
+            all_written = all_written and succeeded
+    return all_written